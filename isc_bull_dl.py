@@ -4,175 +4,620 @@ bulletin, and write a NLLoc phase file per event listed in the bulletin.
 """
 
 
+import os
+import sys
+
+
+# The pickled parser and its help text hold argparse internals and the
+# program name shown in usage messages, so keep one cache per program and
+# Python version.
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'isc_bull_dl')
+_CACHE_TAG = '%s-py%d.%d' % ((os.path.basename(sys.argv[0]) or 'python',) +
+                             tuple(sys.version_info[:2]))
+_ARGCACHE = os.path.join(_CACHE_DIR, 'argparser-%s.pickle' % _CACHE_TAG)
+_HELPCACHE = os.path.join(_CACHE_DIR, 'help-%s.txt' % _CACHE_TAG)
+_BULLETIN_CACHE = os.path.join(_CACHE_DIR, 'bulletins')
+
+
+def _help_is_fresh():
+    """Return True if the cached help text is newer than this script."""
+    try:
+        return os.path.getmtime(_HELPCACHE) >= os.path.getmtime(__file__)
+    except OSError:
+        return False
+
+
+def _print_cached_help():
+    """
+    Write the help text rendered by a previous run to stdout and return True,
+    or return False if there is no help text cached for this script version.
+    """
+    if not _help_is_fresh():
+        return False
+    try:
+        with open(_HELPCACHE, 'r') as f:
+            sys.stdout.write(f.read())
+    except OSError:
+        return False
+    return True
+
+
+# Fast path for --help: skip importing argparse and building the parser.
+if (__name__ == "__main__" and sys.argv[1:2] in (['-h'], ['--help']) and
+        _print_cached_help()):
+    sys.exit(0)
+
+
 import argparse
-import urllib
+import datetime as dt
+import hashlib
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 
+from urllib.parse import urlencode
+
+import requests
+
+
+_MAX_WORKERS = 8
+
+# read size used when streaming a bulletin to disk
+_BUFSIZE = 1 << 20
+
+# ISC keeps reviewing the events of roughly the last two years, so the
+# bulletin of a time window ending after this is not final yet and is not
+# cached
+_CACHE_MIN_AGE = dt.timedelta(days=730)
+
+# Shared by every download so that consecutive queries reuse keep-alive
+# connections to the ISC server; the pool holds one per download worker.
+_SESSION = requests.Session()
+for _prefix in ('http://', 'https://'):
+    _SESSION.mount(_prefix, requests.adapters.HTTPAdapter(
+        pool_connections=_MAX_WORKERS, pool_maxsize=_MAX_WORKERS))
+# Bulletins are plain text and compress well; ask for gzip explicitly rather
+# than relying on whatever encodings the installed urllib3 happens to offer.
+_SESSION.headers['Accept-Encoding'] = 'gzip'
+
+
+# search-region options required by each search shape
+_REQUIRED = {'GLOBAL': frozenset(),
+             'RECT': frozenset(('bot_lat', 'top_lat', 'left_lon',
+                                'right_lon')),
+             'CIRC': frozenset(('ctr_lat', 'ctr_lon', 'max_dist_units',
+                                'radius')),
+             'POLY': frozenset(('coordvals',))}
+
+_SEARCH_OPTIONS = frozenset(chain(*_REQUIRED.values()))
+
+
+def _identity(string):
+    return string
+
+
+class _ProbeDone(Exception):
+    pass
+
+
+class _Ranged:
+    """
+    Argument type that converts a string with `base` and checks that the
+    value lies within [lo, hi]; either bound may be None. Being a class
+    rather than a closure keeps the parser picklable.
+    """
+
+    def __init__(self, base, lo=None, hi=None):
+        self.base = base
+        self.lo = lo
+        self.hi = hi
+        # argparse names the type after this in "invalid ... value" errors
+        self.__name__ = base.__name__
+
+    def __call__(self, string):
+        value = self.base(string)
+        if self.lo is not None and value < self.lo:
+            raise argparse.ArgumentTypeError(
+                '%s is less than %s' % (string, self.lo))
+        if self.hi is not None and value > self.hi:
+            raise argparse.ArgumentTypeError(
+                '%s is greater than %s' % (string, self.hi))
+        return value
+
+
+def _time_of_day(string):
+    try:
+        dt.datetime.strptime(string, '%H:%M:%S')
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            '%r is not a time of day HH:MM:SS' % string)
+    return string
+
+
+_latitude = _Ranged(float, -90, 90)
+_longitude = _Ranged(float, -180, 180)
+_year = _Ranged(int, 1904)
+_month = _Ranged(int, 1, 12)
+_day = _Ranged(int, 1, 31)
+
+# upper bound of --radius per --units; checked once both are known
+_MAX_RADIUS = {'deg': 180, 'km': 20015}
+
+
+def _window_options(start, end):
+    """
+    Map a time window onto the ISC query options for the search time range.
+
+    :param start: start of the time window
+    :type start: `datetime.datetime` object
+    :param end: end of the time window
+    :type end: `datetime.datetime` object
+    :returns: dictionary of query options
+    """
+    return {'start_year': start.year, 'start_month': start.month,
+            'start_day': start.day, 'start_time': start.strftime('%H:%M:%S'),
+            'end_year': end.year, 'end_month': end.month,
+            'end_day': end.day, 'end_time': end.strftime('%H:%M:%S')}
+
+
+def _split_range(start, end, step):
+    """
+    Split a time range at the year or month boundaries it contains.
+
+    :param start: start of the time range
+    :type start: `datetime.datetime` object
+    :param end: end of the time range
+    :type end: `datetime.datetime` object
+    :param step: either 'year' or 'month'
+    :type step: str
+    :returns: list of (start, end) pairs covering the time range
+    """
+    windows = []
+    lo = start
+    while True:
+        if step == 'year':
+            hi = dt.datetime(lo.year + 1, 1, 1)
+        else:
+            hi = dt.datetime(lo.year + lo.month // 12, lo.month % 12 + 1, 1)
+        if hi >= end:
+            windows.append((lo, end))
+            return windows
+        windows.append((lo, hi))
+        lo = hi
+
+
+def _merge_bulletins(pieces, outfile):
+    """
+    Concatenate the bulletins of consecutive time windows into one bulletin,
+    dropping the preamble of all but the first piece and the STOP line of all
+    but the last one.
+    """
+    last = len(pieces) - 1
+    with open(outfile, 'w') as out:
+        for k, piece in enumerate(pieces):
+            in_events = (k == 0)
+            with open(piece, 'r') as f:
+                for line in f:
+                    if not in_events:
+                        if not line.startswith('Event '):
+                            continue
+                        in_events = True
+                    if k != last and line.strip() == 'STOP':
+                        break
+                    out.write(line)
+
+
+def _is_final(query_dic):
+    """
+    Return True if the time window of a query ended long enough ago for its
+    bulletin to be final, i.e. safe to cache.
+    """
+    end = '%(end_year)s-%(end_month)s-%(end_day)s %(end_time)s' % query_dic
+    try:
+        end = dt.datetime.strptime(end, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return False
+    return dt.datetime.now() - end >= _CACHE_MIN_AGE
+
+
+def _is_bulletin(filename):
+    """
+    Return True if `filename` looks like an ISF bulletin, i.e. starts with
+    its DATA_TYPE header or ends with its STOP line, rather than e.g. an
+    error page.
+    """
+    with open(filename, 'rb') as f:
+        if b'DATA_TYPE' in f.read(_BUFSIZE):
+            return True
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        return any(line.strip() == b'STOP' for line in f.read().splitlines())
+
+
+def _cache_file(key):
+    """Return the name of the bulletin cache entry for `key`."""
+    key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(_BULLETIN_CACHE, key + '.txt')
+
 
 class Parser(argparse.ArgumentParser):
 
     # class attributes
-    __search2options = {'GLOBAL': None,
-                        'RECT': ('bot_lat', 'top_lat', 'left_lon',
-                                 'right_lon'),
-                        'CIRC': ('ctr_lat', 'ctr_lon', 'max_dist_units',
-                                 'radius'),
-                        'POLY': ('coordvals',)}
-
     __query_client = "http://www.isc.ac.uk/cgi-bin/web-db-v4?"
 
+    # options that only steer the download and are not sent to ISC
+    __local_options = ('split', 'no_cache')
+
     def __init__(self, *args, **kwargs):
-        super(Parser, self).__init__(*args, **kwargs)
+        super().__init__(*args, **kwargs)
+        # argparse registers a local function as the default type converter,
+        # which can't be pickled; swap in a module-level equivalent.
+        self.register('type', None, _identity)
 
     def verify_search_options(self):
         self.args = self.parse_args()
-        required = Parser.__search2options.pop(self.args.searchshape)
-        conflicts = filter(None, Parser.__search2options.values())
-        conflicts = list(chain(*conflicts))
+        given = frozenset(vars(self.args))
+        required = _REQUIRED[self.args.searchshape]
+        conflicts = _SEARCH_OPTIONS - required
 
-        if (not all([getattr(self.args, r) for r in required]) or
-                any([hasattr(self.args, c) for c in conflicts])):
+        if (required - given) or (conflicts & given):
             msg = '''Missing argument(s) for defined search shape. Check the
             dependent parameters for your considered search type.'''
             self.error(msg)
 
-    def download_bulletin(self):
-        args_dic = vars(self.args)
+        if self.args.searchshape == 'CIRC':
+            units = self.args.max_dist_units
+            if self.args.radius > _MAX_RADIUS[units]:
+                self.error('argument --radius: %s is greater than %s for '
+                           '--units=%s' % (self.args.radius,
+                                           _MAX_RADIUS[units], units))
+
+    def download_bulletin(self, windows=None):
+        """
+        Download the bulletin for the time range given on the command line.
+        The range is queried in one piece unless `windows` is given or the
+        --split option was used; then the time windows are queried
+        concurrently and the pieces are concatenated in order.
+
+        :param windows: sequence of (start, end) `datetime.datetime` pairs
+        :returns: name of the downloaded bulletin file
+        """
+        args_dic = dict((k, v) for (k, v) in vars(self.args).items()
+                        if k not in Parser.__local_options)
         args_dic.update(prime_only='on', include_phases='on',
                         include_headers='on')
-        query_opts = ["=".join((k, str(v))) for (k, v) in args_dic.items()]
-        query_opts = "&".join(query_opts)
 
-        query_url = Parser.__query_client + query_opts
-        self.bulletin, header = urllib.urlretrieve(query_url)
+        if windows is None and getattr(self.args, 'split', None):
+            windows = _split_range(self.__time_range('start'),
+                                   self.__time_range('end'), self.args.split)
+
+        self.__use_cache = not getattr(self.args, 'no_cache', False)
+        if self.__use_cache:
+            os.makedirs(_BULLETIN_CACHE, exist_ok=True)
+
+        if windows is None:
+            self.bulletin = self.__fetch(args_dic)[0]
+            return self.bulletin
+
+        shards = []
+        for start, end in windows:
+            shard = dict(args_dic)
+            shard.update(_window_options(start, end))
+            shards.append(shard)
+
+        # the merged bulletin is cached too, keyed by all of its queries
+        merged = None
+        if self.__use_cache and all(_is_final(s) for s in shards):
+            merged = _cache_file('\n'.join(self.__query_url(s)
+                                           for s in shards))
+            if os.path.exists(merged):
+                self.bulletin = merged
+                return self.bulletin
+
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            fetched = list(executor.map(self.__fetch, shards))
+        pieces = [piece for (piece, cached) in fetched]
+
+        if merged is not None and all(cached for (piece, cached) in fetched):
+            fd, tmpfile = tempfile.mkstemp(suffix='.tmp', dir=_BULLETIN_CACHE)
+            os.close(fd)
+            _merge_bulletins(pieces, tmpfile)
+            os.rename(tmpfile, merged)
+            self.bulletin = merged
+        else:
+            fd, self.bulletin = tempfile.mkstemp(suffix='.txt')
+            os.close(fd)
+            _merge_bulletins(pieces, self.bulletin)
+        for piece, cached in fetched:
+            if not cached:
+                os.remove(piece)
 
         return self.bulletin
 
-
-if __name__ == "__main__":
-    parser = Parser(description='Download ISC bulletin dataset.')
-
+    def __time_range(self, which):
+        d = vars(self.args)
+        date = '%d-%d-%d %s' % (d[which + '_year'], d[which + '_month'],
+                                d[which + '_day'], d[which + '_time'])
+        try:
+            return dt.datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            # the day is not checked against the month when it is parsed
+            self.error('invalid %s date: %s' % (which, date))
+
+    def __query_url(self, query_dic):
+        # sorted, so that the same query always maps onto the same cache key
+        query_opts = sorted((k, v) for (k, v) in query_dic.items()
+                            if v is not None)
+        return Parser.__query_client + urlencode(query_opts, doseq=True)
+
+    def __fetch(self, query_dic):
+        """
+        Download the bulletin of one query, or look it up in the cache.
+
+        :returns: tuple of (file name, whether the file is a cache entry)
+        """
+        query_url = self.__query_url(query_dic)
+
+        cache = self.__use_cache and _is_final(query_dic)
+        if cache:
+            bulletin = _cache_file(query_url)
+            if os.path.exists(bulletin):
+                return bulletin, True
+            fd, tmpfile = tempfile.mkstemp(suffix='.tmp', dir=_BULLETIN_CACHE)
+        else:
+            fd, tmpfile = tempfile.mkstemp(suffix='.txt')
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                with _SESSION.get(query_url, stream=True) as resp:
+                    resp.raise_for_status()
+                    # decode any Content-Encoding while copying
+                    resp.raw.decode_content = True
+                    shutil.copyfileobj(resp.raw, f, _BUFSIZE)
+        except Exception:
+            os.remove(tmpfile)
+            raise
+
+        if not cache:
+            return tmpfile, False
+        if not _is_bulletin(tmpfile):
+            # e.g. an error page; hand it back without filling the cache
+            fd, uncached = tempfile.mkstemp(suffix='.txt')
+            os.close(fd)
+            shutil.move(tmpfile, uncached)
+            return uncached, False
+
+        # only complete bulletins ever appear under the cache key
+        os.rename(tmpfile, bulletin)
+        return bulletin, True
+
+
+# Argument groups as (key, title, description).
+_GROUPS = (
+    ('RECT', 'RECT-rectangular search',
+     'Dependent parameters for --search=RECT option.'),
+    ('CIRC', 'CIRC-circular search',
+     'Dependent parameters for --search=CIRC option.'),
+    ('POLY', 'POLY-polygon search', 'Dependent parameters for --search=POLY'),
+)
+
+# Command-line options as (group key, flag, dest, add_argument keywords); a
+# group key of None puts the option at the top level of the parser. Unless
+# required, an option defaults to argparse.SUPPRESS so that it is left out of
+# the query when not given.
+_OPTIONS = (
     # --- Geographic region ---
-    parser.add_argument('--search', dest='searchshape', required=True,
-                        choices=['GLOBAL', 'RECT', 'CIRC', 'POLY'])
+    (None, '--search', 'searchshape',
+     dict(required=True, choices=['GLOBAL', 'RECT', 'CIRC', 'POLY'])),
 
     # --- RECT (rectangular) search type ---
-    rect_group = parser.add_argument_group(title='RECT-rectangular search',
-                                           description='''Dependent parameters
-                                           for --search=RECT option.''')
-
-    rect_group.add_argument('--blat', dest='bot_lat', type=float,
-                            default=argparse.SUPPRESS, help='''Bottom latitude
-                            of rectangular region (-90 to 90).''')
-
-    rect_group.add_argument('--tlat', dest='top_lat', type=float,
-                            default=argparse.SUPPRESS, help='''Top latitude of
-                            rectangular region (-90 to 90).''')
-
-    rect_group.add_argument('--llon', dest='left_lon', type=float,
-                            default=argparse.SUPPRESS, help='''Left longitude
-                            of rectangular region (-180 to 180).''')
-
-    rect_group.add_argument('--rlon', dest='right_lon', type=float,
-                            default=argparse.SUPPRESS, help='''Right longitude
-                            of rectangular region (-180 to 180).''')
+    ('RECT', '--blat', 'bot_lat',
+     dict(type=_latitude,
+          help='Bottom latitude of rectangular region (-90 to 90).')),
+    ('RECT', '--tlat', 'top_lat',
+     dict(type=_latitude,
+          help='Top latitude of rectangular region (-90 to 90).')),
+    ('RECT', '--llon', 'left_lon',
+     dict(type=_longitude,
+          help='Left longitude of rectangular region (-180 to 180).')),
+    ('RECT', '--rlon', 'right_lon',
+     dict(type=_longitude,
+          help='Right longitude of rectangular region (-180 to 180).')),
 
     # --- CIRC (circular) search type ---
-    circ_group = parser.add_argument_group(title='CIRC-circular search',
-                                           description='''Dependent parameters
-                                           for --search=CIRC option.''')
-
-    circ_group.add_argument('--clat', dest='ctr_lat', type=float,
-                            default=argparse.SUPPRESS, help='''Central latitude
-                            of circular region.''')
-
-    circ_group.add_argument('--clon', dest='ctr_lon', type=float,
-                            default=argparse.SUPPRESS, help='''Central longitude
-                            of circular regio.''')
-
-    circ_group.add_argument('--units', dest='max_dist_units',
-                            choices=['deg', 'km'], default=argparse.SUPPRESS,
-                            help='Units of distance for a circular search.')
-
-    circ_group.add_argument('--radius', dest='radius', type=float,
-                            default=argparse.SUPPRESS, help='''Radius for
-                            circular search region: 0 to 180 if --units=deg,
-                            0 to 20015 if --units=km.''')
+    ('CIRC', '--clat', 'ctr_lat',
+     dict(type=_latitude, help='Central latitude of circular region.')),
+    ('CIRC', '--clon', 'ctr_lon',
+     dict(type=_longitude, help='Central longitude of circular regio.')),
+    ('CIRC', '--units', 'max_dist_units',
+     dict(choices=['deg', 'km'],
+          help='Units of distance for a circular search.')),
+    ('CIRC', '--radius', 'radius',
+     dict(type=_Ranged(float, 0),
+          help='Radius for circular search region: 0 to 180 if --units=deg, '
+               '0 to 20015 if --units=km.')),
 
     # --- POLY (customised polygon) search type ---
-    poly_group = parser.add_argument_group(title='POLY-polygon search',
-                                           description='''Dependent parameters
-                                           for --search=POLY''')
-
-    poly_group.add_argument('--coords', dest='coordvals',
-                            default=argparse.SUPPRESS, help='''Comma seperated
-                            list of coordinates for a desired polygon (lat1,
-                            lon1, lat2, lon2, ..., latN, lonN, lat1, lon1).
-                            Coordinates in the western and southern hemispheres
-                            should be negative.''')
+    ('POLY', '--coords', 'coordvals',
+     dict(help='Comma seperated list of coordinates for a desired polygon '
+               '(lat1, lon1, lat2, lon2, ..., latN, lonN, lat1, lon1). '
+               'Coordinates in the western and southern hemispheres should '
+               'be negative.')),
 
     # --- Time range ---
-    parser.add_argument('--syear', dest='start_year', type=int, required=True,
-                        help='Starting year for events (1904 to 2015).')
-
-    parser.add_argument('--smonth', dest='start_month', required=True,
-                        type=int, help='Starting month for events (1 to 12).')
-
-    parser.add_argument('--sday', dest='start_day', type=int, required=True,
-                        help='Starting day for events (1 to 31).')
-
-    parser.add_argument('--stime', dest='start_time', required=True,
-                        help='''Starting time for events HH:MM:SS
-                        (00:00:00 to 23:59:59).''')
-
-    parser.add_argument('--eyear', dest='end_year', type=int, required=True,
-                        help='Ending year for events (1904 to 2015).')
-
-    parser.add_argument('--emonth', dest='end_month', type=int, required=True,
-                        help='Ending month for events (1 to 12).')
-
-    parser.add_argument('--eday', dest='end_day', type=int, required=True,
-                        help='Ending day for events (1 to 31).')
-
-    parser.add_argument('--etime', dest='end_time', required=True,
-                        help='''Ending time for events HH:MM:SS
-                        (00:00:00 to 23:59:59).''')
+    (None, '--syear', 'start_year',
+     dict(type=_year, required=True,
+          help='Starting year for events (1904 or later).')),
+    (None, '--smonth', 'start_month',
+     dict(type=_month, required=True,
+          help='Starting month for events (1 to 12).')),
+    (None, '--sday', 'start_day',
+     dict(type=_day, required=True,
+          help='Starting day for events (1 to 31).')),
+    (None, '--stime', 'start_time',
+     dict(type=_time_of_day, required=True,
+          help='Starting time for events HH:MM:SS '
+               '(00:00:00 to 23:59:59).')),
+    (None, '--eyear', 'end_year',
+     dict(type=_year, required=True,
+          help='Ending year for events (1904 or later).')),
+    (None, '--emonth', 'end_month',
+     dict(type=_month, required=True,
+          help='Ending month for events (1 to 12).')),
+    (None, '--eday', 'end_day',
+     dict(type=_day, required=True, help='Ending day for events (1 to 31).')),
+    (None, '--etime', 'end_time',
+     dict(type=_time_of_day, required=True,
+          help='Ending time for events HH:MM:SS '
+               '(00:00:00 to 23:59:59).')),
 
     # --- Depth limits ---
-    parser.add_argument('--Zmin', dest='min_dep', default=argparse.SUPPRESS,
-                        type=float, help='Minimum depth of events (km).')
-
-    parser.add_argument('--Zmax', dest='max_dep', default=argparse.SUPPRESS,
-                        type=float, help='Maximum depth of events (km).')
+    (None, '--Zmin', 'min_dep',
+     dict(type=float, help='Minimum depth of events (km).')),
+    (None, '--Zmax', 'max_dep',
+     dict(type=float, help='Maximum depth of events (km).')),
 
     # --- Magnitude limits ---
-    parser.add_argument('--Mmin', dest='min_mag', default=argparse.SUPPRESS,
-                        type=float, help='Minimum magnitude of events.')
-
-    parser.add_argument('--Mmax', dest='max_mag', default=argparse.SUPPRESS,
-                        type=float, help='Maximum magnitude of events.')
-
-    parser.add_argument('--Mtype', dest='req_mag_type',
-                        default=argparse.SUPPRESS,
-                        choices=['Any', 'MB', 'MS', 'MW', 'ML', 'MD'],
-                        help='''Specific magnitude types. The selected magnitude
-                                type will search for all possible magnitudes in
-                                that category (e.g. MB will search for mb, mB,
-                                Mb, mb1mx, etc).''')
-
-    parser.add_argument('--Magcy', dest='req_mag_agcy',
-                        default=argparse.SUPPRESS,
-                        help='''Limit events to magnitudes computed by the
-                                selected agency: {Any, prime, CODE (specific
-                                agency code)}.''')
+    (None, '--Mmin', 'min_mag',
+     dict(type=float, help='Minimum magnitude of events.')),
+    (None, '--Mmax', 'max_mag',
+     dict(type=float, help='Maximum magnitude of events.')),
+    (None, '--Mtype', 'req_mag_type',
+     dict(choices=['Any', 'MB', 'MS', 'MW', 'ML', 'MD'],
+          help='Specific magnitude types. The selected magnitude type will '
+               'search for all possible magnitudes in that category (e.g. '
+               'MB will search for mb, mB, Mb, mb1mx, etc).')),
+    (None, '--Magcy', 'req_mag_agcy',
+     dict(help='Limit events to magnitudes computed by the selected agency: '
+               '{Any, prime, CODE (specific agency code)}.')),
 
     # --- Defining phases limits ---
-    parser.add_argument('--DPmin', dest='min_def', default=argparse.SUPPRESS,
-                        type=int, help='Minimum number of defining phases.')
+    (None, '--DPmin', 'min_def',
+     dict(type=int, help='Minimum number of defining phases.')),
+    (None, '--DPmax', 'max_def',
+     dict(type=int, help='Maximum number of defining phases.')),
+
+    # --- Download ---
+    (None, '--split', 'split',
+     dict(choices=['year', 'month'],
+          help='Split the time range into yearly or monthly queries that '
+               'are downloaded concurrently.')),
+    (None, '--no-cache', 'no_cache',
+     dict(action='store_true',
+          help='Download the bulletin even if the same query was cached by '
+               'an earlier run.')),
+)
+
+
+def build_parser():
+    """Construct the command-line parser from scratch."""
+    parser = Parser(description='Download ISC bulletin dataset.')
 
-    parser.add_argument('--DPmax', dest='max_def', default=argparse.SUPPRESS,
-                        type=int, help='Maximum number of defining phases.')
+    groups = {None: parser}
+    for key, title, description in _GROUPS:
+        groups[key] = parser.add_argument_group(title=title,
+                                                description=description)
+
+    for key, flag, dest, kwargs in _OPTIONS:
+        if not kwargs.get('required'):
+            kwargs = dict(kwargs, default=argparse.SUPPRESS)
+        groups[key].add_argument(flag, dest=dest, **kwargs)
+
+    return parser
+
+
+def _restore_sentinels(parser):
+    """
+    Point the defaults and help texts of an unpickled parser back at
+    ``argparse.SUPPRESS``.
+
+    argparse tests ``default is not SUPPRESS``, but unpickling turns the
+    sentinel into an equal but distinct string, which would then be filled
+    in for (and type-converted from) every option that was not given.
+    """
+    for action in parser._actions:
+        if action.default == argparse.SUPPRESS:
+            action.default = argparse.SUPPRESS
+        if action.help == argparse.SUPPRESS:
+            action.help = argparse.SUPPRESS
+
+
+def _probe(parser, args):
+    """
+    Dry-run `parser` on `args` with its output and exits suppressed. Return
+    False if parsing breaks in a way a freshly built parser would not, e.g.
+    because the cached parser does not match the installed argparse.
+    """
+    def stop(*args, **kwargs):
+        raise _ProbeDone()
+
+    parser.error = parser.exit = parser._print_message = stop
+    try:
+        parser.parse_known_args(args)
+    except _ProbeDone:
+        # a usage error or --help; the real parse will report it
+        pass
+    except Exception:
+        return False
+    finally:
+        del parser.error, parser.exit, parser._print_message
+    return True
+
+
+def _write_help_cache(parser):
+    """Write the help text of `parser` for `_print_cached_help`."""
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(_HELPCACHE, 'w') as f:
+            f.write(parser.format_help())
+    except OSError:
+        pass
+
+
+def load_parser():
+    """
+    Return the command-line parser, unpickling it from the on-disk cache if
+    the cache was written for the current version of this script; otherwise
+    build it and refresh the cache. Passing ``--rebuild-argcache`` as the
+    first argument forces a rebuild.
+    """
+    import pickle
+
+    src_mtime = os.path.getmtime(os.path.abspath(__file__))
+    cache_key = (src_mtime, tuple(sys.version_info))
+
+    if sys.argv[1:2] == ['--rebuild-argcache']:
+        del sys.argv[1]
+    else:
+        try:
+            with open(_ARGCACHE, 'rb') as f:
+                key, parser = pickle.load(f)
+            if key == cache_key:
+                _restore_sentinels(parser)
+                if _probe(parser, sys.argv[1:]):
+                    # the help text is cached separately; bring it back in
+                    # step with the parser if it went missing or stale
+                    if not _help_is_fresh():
+                        _write_help_cache(parser)
+                    return parser
+        except Exception:
+            # missing, stale or unreadable cache -- just rebuild it
+            pass
+
+    parser = build_parser()
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(_ARGCACHE, 'wb') as f:
+            pickle.dump((cache_key, parser), f, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    _write_help_cache(parser)
+
+    return parser
 
-    args = parser.parse_args()
+
+if __name__ == "__main__":
+    parser = load_parser()
     parser.verify_search_options()
     bulletin = parser.download_bulletin()
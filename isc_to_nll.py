@@ -1,4 +1,3 @@
-# -*- coding: utf-8 -*-
 """
 Read and parse ISC bulletin of earthquake data (in ISF format) and write a
 phase data file (in NLLOC_OBS format) per event listed in the bulletin.
@@ -12,9 +11,13 @@ phase data file (in NLLOC_OBS format) per event listed in the bulletin.
 
 import os
 import sys
-import subprocess
+import shutil
 import re
 import datetime as dt
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 
 import numpy as np
 import pandas as pd
@@ -22,7 +25,274 @@ import pandas as pd
 from util import InputError
 
 
-class ProgressBar(object):
+_EVENT_HDR = re.compile(r'^\s*Event\s+')
+_TIME_RE = re.compile(r'([01]\d|2[0-3]):([0-5]\d):([0-5]\d)(?:\.(\d{1,6}))?$')
+
+# fixed-width ISF columns of the origin and phase lines
+_ORIG_DATE = slice(0, 10)
+_ORIG_TIME = slice(11, 22)
+_ORIG_LAT = slice(36, 44)
+_ORIG_LON = slice(45, 54)
+_ORIG_DEPTH = slice(71, 76)
+_PHASE_STA = slice(0, 5)
+_PHASE_CODE = slice(19, 27)
+_PHASE_TIME = slice(28, 40)
+_PHASE_RES = slice(41, 46)
+_PHASE_ONSET = 101
+
+_ONE_DAY = dt.timedelta(days=1)
+_ZERO_DAY = dt.timedelta(0)
+
+# NLLOC_OBS phase table; only the station, onset, phase, arrival time and
+# uncertainty vary, the other columns are fixed
+_NLL_HEADER = ('PHASE ID\tIns\tCmp\tOn\tPhase\tFM\tTime\tErr\tErrMag\tCoda'
+               '\tAmp\tPer\n')
+_NLL_ROW = ('{:<8}\t?\t?\t{}\t{}\t?\t{:%Y%m%d %H%M %S.%f}\tGAU\t{:6.2f}'
+            '\t-1\t-1\t-1\n')
+
+# number of events handed to a worker process at a time
+_EVENTS_PER_TASK = 64
+
+# lookup tables of the current conversion, see `_init_worker`
+_tables = None
+
+
+def _iter_events(bulletin_file):
+    """
+    Read an ISF bulletin line by line and yield the lines of one event at a
+    time, so that only a single event is held in memory.
+
+    :param bulletin_file: name of the bulletin file
+    :type bulletin_file: str
+    :returns: generator of lists of non-empty lines (without line endings);
+        the first line of each list is the remainder of the "Event" header
+        line
+    """
+    with open(bulletin_file, "r") as f:
+        buf = None
+        for line in f:
+            line = line.rstrip('\r\n')
+            m = _EVENT_HDR.match(line)
+            if m:
+                if buf is not None:
+                    yield buf
+                buf = [line[m.end():]]
+            elif line.strip() == 'STOP':
+                break
+            elif line and buf is not None:
+                buf.append(line)
+        if buf is not None:
+            yield buf
+
+
+def _count_events(bulletin_file):
+    """Count the events in an ISF bulletin without parsing them."""
+    n = 0
+    with open(bulletin_file, "r") as f:
+        for line in f:
+            # strip the line ending exactly like `_iter_events`, so that
+            # both agree on what is an event header
+            if _EVENT_HDR.match(line.rstrip('\r\n')):
+                n += 1
+            elif line.strip() == 'STOP':
+                break
+    return n
+
+
+def _parse_date(s):
+    """
+    Parse a fixed-width "YYYY/MM/DD" date field.
+
+    :type s: str
+    :rtype: `datetime.date` object
+    """
+    return dt.date(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+
+
+def _parse_time(s):
+    """
+    Parse a fixed-width "HH:MM:SS" or "HH:MM:SS.fff" time field (with up to
+    six fractional digits).
+
+    :type s: str
+    :returns: `datetime.time` object, or None if `s` is not a valid time of
+        day
+    """
+    m = _TIME_RE.match(s)
+    if m is None:
+        return None
+    hr, mn, sec, frac = m.groups()
+    usec = int((frac or '0').ljust(6, '0'))
+    return dt.time(int(hr), int(mn), int(sec), usec)
+
+
+def _parse_phase_block(phase_block, origin_time, qual2err,
+                       isc_alter2prime_dic, station_rename):
+    """
+    Parse the phase lines of a single event.
+
+    :param phase_block: phase lines of the event (without the header)
+    :type phase_block: list of str
+    :param origin_time: origin time of the event
+    :type origin_time: `datetime.datetime` object
+    :param qual2err: onset-quality to uncertainty table per phase
+    :type qual2err: dict
+    :param isc_alter2prime_dic: ISC alternate to prime station codes
+    :type isc_alter2prime_dic: dict
+    :param station_rename: combined ISC to GFN station renaming table
+    :type station_rename: dict
+    :returns: station codes of the accepted picks and a list of columns
+        (onset, phase, arrival time, uncertainty, residual)
+    """
+    otime = origin_time.time()
+    odate = origin_time.date()
+    arr_stations = []
+    arr_columns = [[] for c in range(5)]
+    onsets, phases, times, errs, residuals = arr_columns
+    for line in phase_block:
+        # the phase filter rejects most lines, so only slice the other
+        # fields of the lines that pass it
+        phase = line[_PHASE_CODE].strip()
+        if phase not in qual2err:
+            continue
+        staCode = line[_PHASE_STA].strip()
+        if not staCode.isalnum():
+            continue
+
+        # skip picks with an unknown onset or a malformed time
+        onset = line[_PHASE_ONSET]
+        uncertainty = qual2err[phase].get(onset)
+        if uncertainty is None:
+            continue
+        atime = _parse_time(line[_PHASE_TIME].strip())
+        if atime is None:
+            continue
+
+        # check whether a one-day jump in date (24 hours) is needed
+        # for those phases arriving after midnight (00:00:00 am).
+        adate = odate + (_ONE_DAY if atime < otime else _ZERO_DAY)
+
+        # a blank residual is common, so don't raise for it
+        res = line[_PHASE_RES].strip()
+        try:
+            res = float(res) if res else np.nan
+        except ValueError:
+            res = np.nan
+
+        # To check if any station renaming should be done.
+        staCode = isc_alter2prime_dic.get(staCode, staCode)
+        staCode = station_rename.get(staCode, staCode)
+
+        arr_stations.append(staCode)
+        onsets.append(onset)
+        phases.append(phase)
+        times.append(dt.datetime.combine(adate, atime))
+        errs.append(uncertainty)
+        residuals.append(res)
+
+    return arr_stations, arr_columns
+
+
+def _init_worker(qual2err, isc_alter2prime_dic, station_rename):
+    """
+    Install the lookup tables used by `_convert_events` in this process, so
+    that they are sent to each worker once rather than with every task.
+    """
+    global _tables
+    _tables = (qual2err, isc_alter2prime_dic, station_rename)
+
+
+def _convert_events(batch, outdir):
+    """
+    Parse a batch of events and write one NLLOC_OBS phase file per event.
+
+    :param batch: events as returned by `_iter_events`
+    :type batch: list of lists of str
+    :param outdir: directory the phase files are written to
+    :type outdir: str
+    :returns: tuple of (event IDs, origin times, (lat, lon, depth) tuples,
+        set of station codes) of the events in the batch
+    """
+    event_ids = []
+    origin_times = []
+    origins = []
+    stations = set()
+    for lines in batch:
+        eventID = lines[0].split()[0]
+
+        ### READ ORIGIN BLOCK ###
+        origin_block = lines[2]
+
+        odate = _parse_date(origin_block[_ORIG_DATE].strip())
+        otime = _parse_time(origin_block[_ORIG_TIME].strip())
+        if otime is None:
+            raise InputError(origin_block[_ORIG_TIME], "Invalid origin time")
+        origin_time = dt.datetime.combine(odate, otime)
+
+        # convert here rather than in the caller, so that a bad origin line
+        # stops the run at its own event, before its file is written
+        try:
+            origins.append((float(origin_block[_ORIG_LAT]),
+                            float(origin_block[_ORIG_LON]),
+                            float(origin_block[_ORIG_DEPTH])))
+        except ValueError:
+            raise InputError(eventID, "Invalid origin latitude, "
+                                      "longitude or depth")
+
+        event_ids.append(eventID)
+        origin_times.append(origin_time)
+
+        ### READ PHASE BLOCK ###
+        arr_stations, arr_columns = _parse_phase_block(
+            lines[4:], origin_time, *_tables)
+        stations.update(arr_stations)
+        onsets, phases, times, errs, residuals = arr_columns
+
+        # final step -- write arrival data to ascii file
+        outfile = ''.join(('isc', eventID, '.nll'))
+        outfile = os.path.join(outdir, outfile)
+        # header
+        chunks = [line + '\n' for line in lines[0:3]]
+        chunks.append(_NLL_HEADER)
+        chunks.extend(_NLL_ROW.format(*row) for row in
+                      zip(arr_stations, onsets, phases, times, errs))
+        with open(outfile, 'w') as f:
+            f.write(''.join(chunks))
+
+    return event_ids, origin_times, origins, stations
+
+
+def _map_batches(func, batches, tables, nworkers):
+    """
+    Apply `func` to every batch and yield the results in order.
+
+    With more than one worker the batches are handed to a process pool,
+    keeping only a few of them in flight so that the bulletin is still
+    streamed rather than read into memory all at once.
+
+    :param tables: arguments of `_init_worker`
+    :type tables: tuple
+    :param nworkers: number of worker processes
+    :type nworkers: int
+    """
+    if nworkers == 1:
+        _init_worker(*tables)
+        for batch in batches:
+            yield func(batch)
+        return
+
+    with ProcessPoolExecutor(nworkers, initializer=_init_worker,
+                             initargs=tables) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(func, batch))
+            if len(pending) >= 2*nworkers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class ProgressBar:
     """
     This is the ProgressBar class, which updates and prints a simple progress
     bar on the screen as standard output.
@@ -31,39 +301,51 @@ class ProgressBar(object):
 
     >>> pbar = ProgressBar(500)
     >>> pbar.start()
-    >>> for i in xrange(1,501):
+    >>> for i in range(1,501):
     >>>     pbar.update(i, percentage=False)
     >>> pbar.finish()
     """
 
     def __init__(self, max_value):
         self.max_value = max_value
+        # query the terminal once rather than on every update
+        self.term_width = shutil.get_terminal_size((80, 24)).columns - 10
+        self._drawn = None
 
     def start(self):
         sys.stdout.write("[...] Parsing the bulletin file...\n")
 
     def update(self, curr_value, percentage=True):
-        term_width = int(subprocess.check_output(['stty', 'size']).split()[1])
-        term_width -= 10
         self.curr_value = curr_value
         progress = int(np.floor(self.curr_value * 100.0 / self.max_value))
+        # only redraw if the bar would look different: when the percentage
+        # changes, or every 1/200th of the way when showing counts
+        if percentage:
+            state = progress
+        elif curr_value == self.max_value:
+            state = curr_value
+        else:
+            state = curr_value // max(1, self.max_value // 200)
+        if state == self._drawn:
+            return
+        self._drawn = state
         left = "\rProcessing"
         if percentage:
-            right = "%d%%" % (progress)
+            right = f"{progress:d}%"
         else:
-            right = "%d/%d" % (self.curr_value, self.max_value)
-        bar_width = term_width - len(left) - len(right)
+            right = f"{self.curr_value:d}/{self.max_value:d}"
+        bar_width = self.term_width - len(left) - len(right)
         block = int(np.floor(progress/100.0 * bar_width))
-        pbar = "[%s%s]" % ("=" * block, " " * (bar_width-block))
+        pbar = f"[{'=' * block}{' ' * (bar_width-block)}]"
         pbar_line = ' '.join((left, pbar, right))
         sys.stdout.write(pbar_line)
         sys.stdout.flush()
 
     def finish(self):
-        sys.stdout.write("\n[ %s ] Done\n" % u'\u2713')
+        sys.stdout.write("\n[ \u2713 ] Done\n")
 
 
-class ISC2NLLoc(object):
+class ISC2NLLoc:
     """
     .. todo:: determine indices of block start/end.
     """
@@ -76,6 +358,9 @@ class ISC2NLLoc(object):
     __isc2gfn_duplicate_dic = {"IVI":"G_IVI" , "PTK":"KO_PTK", "PSI":"PS_PSI",
         "KWP":"GE_KWP", "SUW":"GE_SUW", "LAST":"GE_LAST", "SIVA":"GE_SIVA"}
 
+    # onset quality to time uncertainty [s] for P-type and other phases
+    __qual2err_Ptype = {"i":0.2, "e":0.5, "_":1.0, "q":1.0}
+    __qual2err_nonP = {"i":0.5, "e":1.0, "_":2.0, "q":2.0}
 
     def __init__(self, events, stations):
         self.events = events
@@ -85,8 +370,7 @@ class ISC2NLLoc(object):
     def __read_isc_stations(isc_stafile):
         isc_alter2prime_dic = {}
         with open(isc_stafile, "r") as f:
-            data = f.readlines()
-            for line in data:
+            for line in f:
                 items = [x.strip() for x in line.split(',')]
 
                 first_code, second_code = items[:2]
@@ -106,8 +390,8 @@ class ISC2NLLoc(object):
                 gfn_sta2net_dic[sta] = "_".join((net, sta))
         return gfn_sta2net_dic
 
-    @staticmethod
-    def _qual2err(phase, onset):
+    @classmethod
+    def _qual2err(cls, phase, onset):
         """
         Quality to error mapping.
         The mapping of the quality of the phase picks in observation file
@@ -120,16 +404,15 @@ class ISC2NLLoc(object):
         :type onset: str
         :return: time uncertainty in seconds
         :rtype: float
+        :raises KeyError: for an unknown onset quality
         """
-        qual2err_Ptype = {"i":0.2, "e":0.5, "_":1.0, "q":1.0}
-        qual2err_nonP = {"i":0.5, "e":1.0, "_":2.0, "q":2.0}
+        return cls.__qual2err_table(phase)[onset]
 
+    @classmethod
+    def __qual2err_table(cls, phase):
         if phase.startswith("P") or phase=="p":
-            uncertainty = qual2err_Ptype[onset]
-        else:
-            uncertainty = qual2err_nonP[onset]
-
-        return uncertainty
+            return cls.__qual2err_Ptype
+        return cls.__qual2err_nonP
 
     @staticmethod
     def __average_pick(odate, otime, pick_list):
@@ -144,17 +427,17 @@ class ISC2NLLoc(object):
         :param pick_list: list of tuples of (onsetQual, arrDate, arrTime, pickErr, ttRes)
         :returns: time, date, uncertainty and residual for average pick
         """
-        time_list = [x[2] for x in pick_list]
-        total = sum(t.hour*36e8 + t.minute*6e7 + t.second*1e6 + t.msecond for t in time_list)
-        average =  total / len(time_list)
-        sec, microsec = [int(x) for x in divmod(average, 1e6)]
-        mn, sec = [int(x) for x in divmod(sec, 60)]
-        hr, mn = [int(x) for x in divmod(mn, 60)]
+        # arrival times as integer microseconds of the day
+        times_us = np.fromiter(
+            ((t.hour*3600 + t.minute*60 + t.second)*1000000 + t.microsecond
+             for t in (x[2] for x in pick_list)),
+            dtype=np.int64, count=len(pick_list))
+        average = int(times_us.sum()) // len(times_us)
+        sec, microsec = divmod(average, 1000000)
+        mn, sec = divmod(sec, 60)
+        hr, mn = divmod(mn, 60)
         arrtime = dt.time(hr, mn, sec, microsec)
-        if arrtime < otime:
-            arrdate = odate + dt.timedelta(days=1)
-        else:
-            arrdate = odate + dt.timedelta(days=0)
+        arrdate = odate + (_ONE_DAY if arrtime < otime else _ZERO_DAY)
 
         onset = '?'
         uncertainty = np.mean([x[-2] for x in pick_list])
@@ -169,162 +452,94 @@ class ISC2NLLoc(object):
 
     @classmethod
     def bulletin_parser(cls, bulletin_file, isc_stafile, gfn_stafile, Phases,
-                        outdir=None):
-        stations = []
+                        outdir=None, nworkers=1):
+        """
+        Read and parse an ISC bulletin and write one NLLOC_OBS phase file
+        per event.
+
+        :param bulletin_file: name of the bulletin file (in ISF format)
+        :type bulletin_file: str
+        :param isc_stafile: name of the ISC station file
+        :type isc_stafile: str
+        :param gfn_stafile: name of the GFN station file
+        :type gfn_stafile: str
+        :param Phases: phases to keep, e.g. ``['P', 'S']``
+        :type Phases: iterable of str
+        :param outdir: directory for the phase files, created if needed
+            (default: ``./isc_data_nlloc_format``)
+        :type outdir: str
+        :param nworkers: number of worker processes converting the events;
+            1 (the default) converts them in the calling process, None uses
+            one process per CPU. With more than one worker the calling
+            script must guard its entry point with
+            ``if __name__ == '__main__':`` on platforms that start the
+            workers with spawn or forkserver (e.g. macOS and Windows).
+        :type nworkers: int or None
+        :returns: `ISC2NLLoc` instance holding the events and stations
+        """
+        stations = set()
 
         for f in (bulletin_file, isc_stafile, gfn_stafile):
-            if not isinstance(f, basestring):
+            if not isinstance(f, str):
                 raise InputError(f, "Need string or buffer")
             if not os.path.exists(f):
                 raise InputError(f, "No such file or directory")
 
-        if not outdir:
-            outdir = "./isc_data_nlloc_format"
-            os.mkdir(outdir)
-        elif not isinstance(outdir, basestring):
+        outdir = outdir or "./isc_data_nlloc_format"
+        if not isinstance(outdir, str):
             raise InputError(outdir, "Need string or buffer")
-        elif not os.path.exists(outdir):
-            raise InputError(outdir, "No such file or directory")
+        os.makedirs(outdir, exist_ok=True)
 
-        if not isinstance(Phases, list):
-            Phases = list(Phases)
+        # the error table only depends on the phase, so pick it once per
+        # requested phase rather than once per pick; its keys double as the
+        # set of requested phases
+        qual2err = {}
         for ph in Phases:
-            if not isinstance(ph, basestring):
+            if not isinstance(ph, str):
                 raise InputError(ph, "Need a string or buffer")
+            qual2err[ph] = cls.__qual2err_table(ph)
 
         isc_alter2prime_dic = cls.__read_isc_stations(isc_stafile)
         gfn_sta2net_dic = cls.__read_gfn_stations(gfn_stafile)
-
-        with open(bulletin_file, "r") as f:
-            textdata = f.read()
-            split_bulletin = re.split(r'\s+STOP\s+', textdata)[0]
-            split_bulletin = re.split(r'\s+Event\s+', split_bulletin)[1:]
-
-        nEvents = len(split_bulletin)
+        # merge the ISC-to-GFN renaming tables into one lookup; later
+        # updates win, i.e. aliases over duplicates over GFN station codes
+        station_rename = dict(gfn_sta2net_dic)
+        station_rename.update(cls.__isc2gfn_duplicate_dic)
+        station_rename.update(cls.__isc2gfn_alias_dic)
+
+        # a cheap first pass gives the progress bar its total; the events
+        # themselves are then streamed from the file in batches
+        nEvents = _count_events(bulletin_file)
         pbar = ProgressBar(nEvents)
         pbar.start()
 
-        eindex = range(len(split_bulletin))
-        ecolumns = ['Origin-Time', 'Lat', 'Lon', 'Depth']
-        events = pd.DataFrame(index=eindex, columns=ecolumns)
-        events.index.names = ['Event-ID']
-        for i, event in enumerate(split_bulletin):
-            lines = event.splitlines()
-            # remove empty lines
-            lines = filter(None, lines)
-            eventID = lines[0].split()[0]
-
-            ### READ ORIGIN BLOCK ###
-            origin_block = lines[2]
-
-            odate = dt.datetime.strptime(origin_block[0:10].strip(), "%Y/%m/%d")
-            otime = dt.datetime.strptime(origin_block[11:22].strip(), "%H:%M:%S.%f")
-            origin_time = dt.datetime.combine(odate, otime.time())
-            otime_fixflag = origin_block[22].strip()
-            otime_err = origin_block[24:29].strip()
-            if any(otime_err):
-                otime_err = float(otime_err)
-
-            residual_rms = origin_block[30:35].strip()
-            if any(residual_rms):
-                residual_rms = float(residual_rms)
-
-            elat = float(origin_block[36:44])
-            elon = float(origin_block[45:54])
-            epicenter_fixflag = origin_block[54].strip()
-            if not any(epicenter_fixflag):
-                try:
-                    # the axes of the 90% error ellipse of the epicneter [km]
-                    err_ellipse_smaj = float(origin_block[55:60])
-                    err_ellipse_smin = float(origin_block[61:66])
-                    # the strike (0-360) of the error ellipse clock-wise from North [deg]
-                    err_ellipse_azi = float(origin_block[67:70])
-                except:
-                    pass
-
-            edepth = float(origin_block[71:76])
-            depth_fixflag = origin_block[76].strip()
-            if not any(depth_fixflag):
-                try:
-                    # depth error for a 90% confidence level
-                    depth_error = float(origin_block[78:82])
-                except:
-                    pass
-
-            events.ix[i, ecolumns] = origin_time, elat, elon, edepth
-            events.rename(index={i:eventID}, inplace=True)
-
-            ### READ PHASE BLOCK ###
-            phase_block = lines[4:]
-            index = range(len(phase_block))
-            columns = ['On', 'Phase', 'Time', 'ErrMag', 'Residual']
-            arrData = pd.DataFrame(index=index, columns=columns)
-            for j,line in enumerate(phase_block):
-                staCode = line[0:5].strip()
-                phase = line[19:27].strip()
-                res = line[41:46].strip()
-                onset = line[101]
-
-                if staCode.isalnum() and phase.isalnum() and phase in Phases:
-                    try:
-                        try:
-                            atime = dt.datetime.strptime(line[28:40].strip(), "%H:%M:%S.%f")
-                        except:
-                            atime = dt.datetime.strptime(line[28:40].strip(), "%H:%M:%S")
-                        # check whether a one-day jump in date (24 hours) is needed
-                        # for those phases arriving after midnight (00:00:00 am).
-                        if atime.time() < origin_time.time():
-                            adate = origin_time.date() + dt.timedelta(days=1)
-                        else:
-                            adate = origin_time.date()
-                        arrival_time = dt.datetime.combine(adate, atime.time())
-
-                        try:
-                            res = float(res)
-                        except ValueError:
-                            res = np.nan
-
-                        uncertainty = cls._qual2err(phase, onset)
-
-                        # To check if any station renaming should be done.
-                        if staCode in isc_alter2prime_dic.keys():
-                            staCode = isc_alter2prime_dic[staCode]
-
-                        if staCode in cls.__isc2gfn_alias_dic.keys():
-                            staCode = cls.__isc2gfn_alias_dic[staCode]
-                        elif staCode in cls.__isc2gfn_duplicate_dic.keys():
-                            staCode = cls.__isc2gfn_duplicate_dic[staCode]
-                        elif staCode in gfn_sta2net_dic.keys():
-                            staCode = gfn_sta2net_dic[staCode]
-
-                        if staCode not in stations:
-                            stations.append(staCode)
-
-                        arrData.ix[j, columns] = onset, phase, arrival_time, uncertainty, res
-                        arrData.Time = pd.to_datetime(arrData.Time)
-                        arrData.rename(index={j:staCode.ljust(8)}, inplace=True)
-                    except:
-                        continue
-
-            arrData.dropna(axis=0, how='all', inplace=True)
-            arrData.Time = pd.to_datetime(arrData.Time)
-            arrData['Err'] = 'GAU'
-            arrData['Ins'], arrData['Cmp'], arrData['FM'] = ['?']*3
-            arrData['Coda'], arrData['Amp'], arrData['Per'] = [-1]*3
-
-            # final step -- write arrival data to ascii file
-            outfile = ''.join(('isc', eventID, '.nll'))
-            outfile = os.path.join(outdir, outfile)
-            with open(outfile, 'w') as f:
-                # header
-                for line in lines[0:3]:
-                    f.write(line + '\n')
-
-            arrData.to_csv(outfile, mode='a', sep='\t', float_format='%6.2f',
-                           index_label='PHASE ID', date_format="%Y%m%d %H%M %S.%f",
-                           columns=['Ins','Cmp','On','Phase','FM','Time','Err','ErrMag','Coda','Amp','Per'])
-
-            pbar.update(i+1)
+        # events are independent of each other, so batches of them can be
+        # converted by `nworkers` processes
+        events_iter = _iter_events(bulletin_file)
+        batches = iter(lambda: list(islice(events_iter, _EVENTS_PER_TASK)), [])
+        tables = (qual2err, isc_alter2prime_dic, station_rename)
+        results = _map_batches(partial(_convert_events, outdir=outdir),
+                               batches, tables,
+                               nworkers or os.cpu_count() or 1)
+
+        # one array per column, filled in place as the events are parsed
+        event_ids = []
+        origin_times = np.empty(nEvents, dtype='datetime64[us]')
+        lats = np.empty(nEvents, dtype=np.float64)
+        lons = np.empty(nEvents, dtype=np.float64)
+        depths = np.empty(nEvents, dtype=np.float64)
+        for batch_ids, batch_times, batch_origins, batch_stations in results:
+            i = len(event_ids)
+            j = i + len(batch_ids)
+            origin_times[i:j] = batch_times
+            lats[i:j], lons[i:j], depths[i:j] = zip(*batch_origins)
+            event_ids.extend(batch_ids)
+            stations.update(batch_stations)
+            pbar.update(len(event_ids))
         pbar.finish()
 
-        return cls(events, stations)
\ No newline at end of file
+        events = pd.DataFrame({'Origin-Time': origin_times, 'Lat': lats,
+                               'Lon': lons, 'Depth': depths},
+                              index=pd.Index(event_ids, name='Event-ID'))
+
+        return cls(events, sorted(stations))
\ No newline at end of file
@@ -11,4 +11,7 @@ class InputError(Error):
     def __init__(self, expr, msg):
         self.expr = expr
         self.msg = msg
-        super(InputError, self).__init__(str("%s : %r") % (msg, expr))
+        super().__init__(f"{msg} : {expr!r}")
+    def __reduce__(self):
+        # keep the error picklable, e.g. when raised in a worker process
+        return (self.__class__, (self.expr, self.msg))